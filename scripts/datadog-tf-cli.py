@@ -7,6 +7,10 @@ import json
 import sys
 from typing import Dict, Any, List, Optional
 import re
+import glob
+import math
+import textwrap
+from decimal import Decimal
 from datetime import datetime
 
 # ANSI color codes for terminal output
@@ -613,6 +617,325 @@ def bulk_operation(operation: str, config_dir: str):
     
     print_success(f"\nBulk {operation} completed")
 
+# Patterns used when applying environment overlays, compiled once per process
+HCL_TOKEN_PATTERN = re.compile(r'''
+    (?P<ws>\s+|\#[^\n]*|//[^\n]*|/\*.*?\*/)
+  | <<(?P<indent>-?)(?P<heredoc>\w+)[^\n]*\n
+  | "(?P<string>(?:[^"\\]|\\.)*)"
+  | (?P<number>-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+  | (?P<ident>[A-Za-z_][\w\-]*)
+  | (?P<punct>[{}\[\]=,:])
+''', re.VERBOSE | re.DOTALL)
+HCL_STRING_PATTERN = re.compile(r'\\(u[0-9a-fA-F]{4}|U[0-9a-fA-F]{8}|.)|(\$\$\{|%%\{)|([$%]\{)', re.DOTALL)
+HCL_HEREDOC_PATTERN = re.compile(r'()(\$\$\{|%%\{)|([$%]\{)')
+HCL_ESCAPES = {'n': '\n', 'r': '\r', 't': '\t', '"': '"', '\\': '\\'}
+ENV_TAG_PATTERN = re.compile(r'^env:')
+QUERY_THRESHOLD_PATTERN = re.compile(r'([<>]=?)\s*-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?\s*$')
+TRAILING_HANDLE_LINE_PATTERN = re.compile(r'(?:^|\n)[ \t]*@[\w\-.]+(?:[ \t]+@[\w\-.]+)*$')
+MESSAGE_HANDLE_PATTERN = re.compile(r'(?<![\w.@])@[\w\-.]*\w')
+CONDITIONAL_BLOCK_PATTERN = re.compile(r'\{\{[#^]')
+
+# Top-level sections whose entries only need tag overlays
+TAGGED_SECTIONS = ('dashboards', 'slos', 'synthetics')
+
+def decode_hcl_string(raw: str, pattern=HCL_STRING_PATTERN) -> str:
+    """Decode escapes in a tfvars string, rejecting ${...} and %{...} templates"""
+    def replace(match):
+        escape, literal_template = match.group(1), match.group(2)
+        if escape:
+            if escape[0] in 'uU' and len(escape) > 1:
+                return chr(int(escape[1:], 16))
+            if escape not in HCL_ESCAPES:
+                raise ValueError(f"Invalid escape sequence in tfvars string: \\{escape}")
+            return HCL_ESCAPES[escape]
+        if literal_template:
+            # $${ and %%{ are the escaped forms of a literal ${ and %{
+            return literal_template[1:]
+        raise ValueError(f"Unsupported expression in tfvars string: {raw!r}")
+    return pattern.sub(replace, raw)
+
+def tokenize_hcl(text: str) -> List[Any]:
+    """Split a terraform.tfvars file into (kind, value) tokens"""
+    tokens = []
+    pos = 0
+    while pos < len(text):
+        match = HCL_TOKEN_PATTERN.match(text, pos)
+        if not match:
+            raise ValueError(f"Unexpected character at offset {pos}: {text[pos]!r}")
+        pos = match.end()
+        kind = match.lastgroup
+        if kind == 'ws':
+            continue
+        if kind == 'heredoc':
+            # Heredoc bodies run until a line containing only the marker
+            marker = match.group('heredoc')
+            end = re.compile(rf'^[ \t]*{re.escape(marker)}[ \t]*$', re.MULTILINE).search(text, pos)
+            if not end:
+                raise ValueError(f"Unterminated heredoc: {marker}")
+            body = text[pos:end.start()]
+            # The <<- form strips the common leading indentation, like Terraform does
+            body = textwrap.dedent(body) if match.group('indent') else body
+            tokens.append(('string', decode_hcl_string(body, HCL_HEREDOC_PATTERN)))
+            pos = end.end()
+        elif kind == 'string':
+            tokens.append(('string', decode_hcl_string(match.group('string'))))
+        else:
+            tokens.append((kind, match.group(kind)))
+    return tokens
+
+def hcl_token(tokens: List[Any], pos: int):
+    """Return the token at pos, failing cleanly on truncated input"""
+    if pos >= len(tokens):
+        raise ValueError("Unexpected end of tfvars")
+    return tokens[pos]
+
+def parse_hcl_value(tokens: List[Any], pos: int):
+    """Parse a single tfvars value starting at pos, returning (value, next_pos)"""
+    kind, value = hcl_token(tokens, pos)
+    if kind == 'string':
+        return value, pos + 1
+    if kind == 'number':
+        return (int(value) if value.lstrip('-').isdigit() else float(value)), pos + 1
+    if kind == 'ident':
+        literals = {'true': True, 'false': False, 'null': None}
+        if value not in literals:
+            raise ValueError(f"Unsupported expression in tfvars: {value}")
+        return literals[value], pos + 1
+    if value == '[':
+        items = []
+        pos += 1
+        while hcl_token(tokens, pos) != ('punct', ']'):
+            item, pos = parse_hcl_value(tokens, pos)
+            items.append(item)
+            if hcl_token(tokens, pos) == ('punct', ','):
+                pos += 1
+        return items, pos + 1
+    if value == '{':
+        return parse_hcl_body(tokens, pos + 1, closing='}')
+    raise ValueError(f"Unexpected token in tfvars: {value}")
+
+def parse_hcl_body(tokens: List[Any], pos: int = 0, closing: Optional[str] = None):
+    """Parse `key = value` pairs until the closing brace (or end of file)"""
+    result = {}
+    while pos < len(tokens):
+        if closing and tokens[pos] == ('punct', closing):
+            return result, pos + 1
+        kind, key = tokens[pos]
+        if kind not in ('ident', 'string') or hcl_token(tokens, pos + 1) not in (('punct', '='), ('punct', ':')):
+            raise ValueError(f"Expected 'key = value' in tfvars, got: {key}")
+        result[key], pos = parse_hcl_value(tokens, pos + 2)
+        if pos < len(tokens) and tokens[pos] == ('punct', ','):
+            pos += 1
+    if closing:
+        raise ValueError("Unexpected end of tfvars")
+    return result, pos
+
+def load_tfvars(tfvars_path: str) -> Dict[str, Any]:
+    """Load a terraform.tfvars file (literal values only) into a dictionary"""
+    with open(tfvars_path, 'r') as f:
+        tokens = tokenize_hcl(f.read())
+    values, _ = parse_hcl_body(tokens)
+    return values
+
+def parse_threshold(name: str, value: Any):
+    """Convert a monitor_thresholds value to an int or float"""
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"monitor_thresholds.{name} must be a number, got: {value!r}")
+    if isinstance(value, int):
+        return value
+    try:
+        threshold = float(value)
+    except ValueError:
+        raise ValueError(f"monitor_thresholds.{name} must be a number, got: {value!r}")
+    if not math.isfinite(threshold):
+        raise ValueError(f"monitor_thresholds.{name} must be a finite number, got: {value!r}")
+    return int(threshold) if threshold.is_integer() else threshold
+
+def format_threshold(threshold) -> str:
+    """Format a threshold for a monitor query as a plain decimal (no exponent)"""
+    return format(Decimal(repr(threshold)), 'f')
+
+def load_environment_overlays(environments_dir: str) -> Dict[str, Dict[str, Any]]:
+    """Read per-environment overlays from environments/*/terraform.tfvars"""
+    overlays = {}
+    for tfvars_path in sorted(glob.glob(os.path.join(environments_dir, '*', 'terraform.tfvars'))):
+        env_dir = os.path.basename(os.path.dirname(tfvars_path))
+        try:
+            tfvars = load_tfvars(tfvars_path)
+
+            # Threshold overrides keyed by "<file>.<section>.<monitor>" in the YAML configurations
+            thresholds = {name: parse_threshold(name, value)
+                          for name, value in (tfvars.get('monitor_thresholds') or {}).items()}
+        except ValueError as e:
+            print_error(f"Error parsing {tfvars_path}: {e}")
+            sys.exit(1)
+
+        overlays[env_dir] = {
+            'environment': tfvars.get('environment', env_dir),
+            'global_tags': tfvars.get('global_tags') or {},
+            'notification_channels': tfvars.get('notification_channels') or [],
+            'thresholds': thresholds
+        }
+    return overlays
+
+def apply_tag_overlay(tags: List[str], overlay: Dict[str, Any]) -> List[str]:
+    """Replace the env tag and add any global tags not already set"""
+    result = [tag for tag in tags if not ENV_TAG_PATTERN.match(tag)]
+    result.append(f"env:{overlay['environment']}")
+    for key, value in overlay['global_tags'].items():
+        if key != 'env' and not any(tag.startswith(f"{key}:") for tag in result):
+            result.append(f"{key}:{value}")
+    return result
+
+def apply_threshold_overlay(key: str, monitor: Dict[str, Any], result: Dict[str, Any], threshold, problems: List[str]):
+    """Write a threshold override into the query, threshold and thresholds.critical of a monitor"""
+    if 'query' in monitor:
+        query, count = QUERY_THRESHOLD_PATTERN.subn(lambda m: f"{m.group(1)} {format_threshold(threshold)}", monitor['query'])
+        if not count:
+            problems.append(f"{key}: query does not end in '<operator> <number>', threshold override not applied")
+            return
+        result['query'] = query
+
+    thresholds = monitor.get('thresholds')
+    if isinstance(thresholds, dict) and 'critical' in thresholds:
+        critical = format_threshold(threshold) if isinstance(thresholds['critical'], str) else threshold
+        result['thresholds'] = dict(thresholds, critical=critical)
+    if 'threshold' in monitor or not isinstance(thresholds, dict):
+        result['threshold'] = threshold
+
+def apply_channel_overlay(key: str, monitor: Dict[str, Any], result: Dict[str, Any], channels: List[str], problems: List[str]):
+    """Replace a monitor's notification channels and the @handles in its message"""
+    message = monitor.get('message')
+    if message is not None and CONDITIONAL_BLOCK_PATTERN.search(message):
+        # Handles inside {{#is_alert}}-style blocks only fire for that state, so don't guess
+        problems.append(f"{key}: message has conditional blocks, notification handles were not rewritten")
+        return
+
+    result['notification_channels'] = channels[:]
+    if message is None:
+        return
+    message = strip_notification_handles(message, monitor.get('notification_channels', []))
+    handles = ' '.join(channels)
+    result['message'] = f"{message}\n\n{handles}" if message else handles
+
+    stray = [handle for handle in MESSAGE_HANDLE_PATTERN.findall(result['message']) if handle not in channels]
+    if stray:
+        problems.append(f"{key}: message still notifies {', '.join(dict.fromkeys(stray))}")
+
+def apply_monitor_overlay(key: str, monitor: Dict[str, Any], overlay: Dict[str, Any], problems: List[str]) -> Dict[str, Any]:
+    """Return a copy of a monitor with environment tags, threshold and channels applied"""
+    # Shallow copy: unchanged fields are shared with the parsed config
+    result = dict(monitor)
+    result['tags'] = apply_tag_overlay(monitor.get('tags', []), overlay)
+
+    threshold = overlay['thresholds'].get(key)
+    if threshold is not None:
+        apply_threshold_overlay(key, monitor, result, threshold, problems)
+
+    channels = overlay['notification_channels']
+    if channels:
+        apply_channel_overlay(key, monitor, result, channels, problems)
+    return result
+
+def strip_notification_handles(message: str, channels: List[str]) -> str:
+    """Remove a monitor's own channels and a trailing line of @handles from its message"""
+    for channel in channels:
+        # Only standalone handles, so email addresses are left alone
+        message = re.sub(rf'(?<!\S){re.escape(channel)}(?!\S)', '', message)
+    return TRAILING_HANDLE_LINE_PATTERN.sub('', message.rstrip()).rstrip()
+
+def apply_resource_overlay(resource: Dict[str, Any], overlay: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a resource with environment tags applied, sharing it if it has no tags"""
+    if 'tags' not in resource:
+        return resource
+    return dict(resource, tags=apply_tag_overlay(resource['tags'], overlay))
+
+def overlay_section_kind(section: str, value: Any) -> Optional[str]:
+    """Classify a top-level section as 'monitors', 'resources' or 'resource' (None if unsupported)"""
+    if not isinstance(value, dict):
+        return None
+    if section.endswith('monitors'):
+        return 'monitors'
+    if section in TAGGED_SECTIONS:
+        return 'resources'
+    if section == 'dashboard':
+        return 'resource'
+    return None
+
+def render_environment(config: Dict[str, Any], overlay: Dict[str, Any], source: str):
+    """Render a validated configuration for a single environment, returning (rendered, problems)"""
+    rendered = dict(config)
+    problems = []
+    for section, value in config.items():
+        kind = overlay_section_kind(section, value)
+        if kind == 'monitors':
+            rendered[section] = {name: apply_monitor_overlay(f"{source}.{section}.{name}", monitor, overlay, problems)
+                                 for name, monitor in value.items()}
+        elif kind == 'resources':
+            # Only tags differ between environments for the other resource types
+            rendered[section] = {name: apply_resource_overlay(resource, overlay)
+                                 for name, resource in value.items()}
+        elif kind == 'resource':
+            rendered[section] = apply_resource_overlay(value, overlay)
+        else:
+            problems.append(f"{source}.{section}: section copied without environment overlays")
+    return rendered, problems
+
+def matrix_operation(config_path: str, environments_dir: str, output_dir: str):
+    """Render configuration files for every environment in a single pass"""
+    overlays = load_environment_overlays(environments_dir)
+    if not overlays:
+        print_error(f"No terraform.tfvars files found under: {environments_dir}")
+        sys.exit(1)
+
+    if os.path.isdir(config_path):
+        config_files = sorted(os.path.join(config_path, f) for f in os.listdir(config_path)
+                              if f.endswith('.yaml') or f.endswith('.yml'))
+    else:
+        config_files = [config_path]
+
+    if not config_files:
+        print_error(f"No YAML files found in directory: {config_path}")
+        sys.exit(1)
+
+    failed = []
+    monitor_keys = set()
+    print_header(f"Rendering {len(config_files)} files for {len(overlays)} environments: {', '.join(overlays)}")
+
+    for config_file in config_files:
+        # Parse and validate once, then render every environment from the same structure
+        config = validate_yaml(config_file)
+        print_info(f"\nProcessing: {config_file}")
+
+        source = os.path.splitext(os.path.basename(config_file))[0]
+        monitor_keys.update(f"{source}.{section}.{name}" for section, value in config.items()
+                            if overlay_section_kind(section, value) == 'monitors' for name in value)
+
+        for env_dir, overlay in overlays.items():
+            output_path = os.path.join(output_dir, env_dir, os.path.basename(config_file))
+            rendered, problems = render_environment(config, overlay, source)
+            ensure_directory(output_path)
+            with open(output_path, 'w') as f:
+                yaml.dump(rendered, f, default_flow_style=False)
+            if problems:
+                failed.append(output_path)
+                for problem in problems:
+                    print_warning(f"  {problem}")
+                print_warning(f"! {env_dir}: {output_path} (not fully overlaid)")
+            else:
+                print_success(f"✓ {env_dir}: {output_path}")
+
+    # Overrides that match no rendered monitor are usually typos
+    for env_dir, overlay in overlays.items():
+        unmatched = sorted(set(overlay['thresholds']) - monitor_keys)
+        if unmatched:
+            print_warning(f"\n{env_dir}: monitor_thresholds keys matched no monitor: {', '.join(unmatched)}")
+
+    if failed:
+        print_error(f"\n{len(failed)} rendered file(s) were not fully overlaid: {', '.join(failed)}")
+        sys.exit(1)
+    print_success("\nMatrix rendering completed")
+
 @click.group()
 def cli():
     """Datadog Terraform CLI - Simplify Datadog resource deployment"""
@@ -663,6 +986,16 @@ def bulk(operation: str, config_dir: str):
     """Perform bulk operations on multiple configuration files"""
     bulk_operation(operation, config_dir)
 
+@cli.command()
+@click.argument('config_path')
+@click.option('--environments-dir', '-e', default=None, help='Directory containing <env>/terraform.tfvars (default: environments/)')
+@click.option('--output-dir', '-o', default=None, help='Directory to write rendered configurations to (default: build/environments/)')
+def matrix(config_path: str, environments_dir: Optional[str], output_dir: Optional[str]):
+    """Render a configuration file or directory for every environment"""
+    matrix_operation(config_path,
+                     environments_dir or os.path.join(get_project_root(), 'environments'),
+                     output_dir or os.path.join(get_project_root(), 'build', 'environments'))
+
 @cli.command()
 def version():
     """Show version information"""
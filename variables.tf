@@ -32,6 +32,18 @@ variable "global_tags" {
   default     = {}
 }
 
+variable "notification_channels" {
+  type        = list(string)
+  description = "Notification handles for this environment (used by the CLI matrix command)"
+  default     = []
+}
+
+variable "monitor_thresholds" {
+  type        = map(number)
+  description = "Threshold overrides keyed by \"<file>.<section>.<monitor>\" in CLI YAML configurations (used by the CLI matrix command)"
+  default     = {}
+}
+
 # Resource definitions - these map to the modules in the /resources directory
 variable "dashboards" {
   type        = any